@@ -79,6 +79,19 @@ class DBManager:
             logger.error(f"Error reading documents: {e}")
             return []
 
+    def aggregate(self, pipeline):
+        """Run an aggregation pipeline and return the resulting documents."""
+        if not self.client:
+            logger.warning("Cannot run aggregation; MongoDB connection not available")
+            return []
+        try:
+            documents = list(self.collection.aggregate(pipeline, allowDiskUse=True))
+            logger.info(f"Aggregation returned {len(documents)} documents")
+            return documents
+        except PyMongoError as e:
+            logger.error(f"Error running aggregation: {e}")
+            return []
+
     def update_document(self, filter, new_data):
         """Update a document that matches the filter with new data."""
         if not self.client:
@@ -0,0 +1,201 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+class IngestionJob:
+    """State and progress of a single background PDF ingestion."""
+    def __init__(self, pdf_path: str):
+        self.job_id = str(uuid.uuid4())
+        self.pdf_path = pdf_path
+        self.status = "queued"  # queued -> running -> completed | failed
+        self.error = None
+        self.total_pages = 0
+        self.pages_parsed = 0
+        self.chunks_embedded = 0
+        self.vectors_indexed = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self) -> Dict:
+        """Return a JSON-serializable snapshot of the job."""
+        return {
+            "job_id": self.job_id,
+            "pdf_path": self.pdf_path,
+            "status": self.status,
+            "error": self.error,
+            "progress": {
+                "total_pages": self.total_pages,
+                "pages_parsed": self.pages_parsed,
+                "chunks_embedded": self.chunks_embedded,
+                "vectors_indexed": self.vectors_indexed,
+            },
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class IngestionManager:
+    def __init__(self, pdf_processor, vector_store_manager, num_workers=2, max_queue_size=16, batch_size=32, max_finished_jobs=1000):
+        """
+        Run PDF ingestion jobs on a bounded pool of background worker threads.
+
+        Chunks are embedded and indexed in batches, so they become visible to the
+        live retriever while the rest of the document is still being processed.
+
+        :param pdf_processor: PDFProcessor used for parsing, normalization, splitting and MongoDB storage.
+        :param vector_store_manager: VectorStoreManager backing the live retriever.
+        :param num_workers: Number of worker threads processing jobs.
+        :param max_queue_size: Maximum number of pending jobs; further submissions are rejected.
+        :param batch_size: Number of chunks embedded and indexed together.
+        :param max_finished_jobs: Number of completed/failed jobs kept for status queries; older ones are dropped.
+        """
+        # Chunks are embedded with the vector store's model but saved through the PDF processor,
+        # which tags them with its own model name: the two must agree
+        if pdf_processor.embedding_model_name != vector_store_manager.embedding_model_name:
+            raise ValueError(
+                f"Embedding model mismatch: PDF processor uses '{pdf_processor.embedding_model_name}', "
+                f"vector store uses '{vector_store_manager.embedding_model_name}'"
+            )
+        self.pdf_processor = pdf_processor
+        self.vector_store_manager = vector_store_manager
+        self.batch_size = batch_size
+        self.max_finished_jobs = max_finished_jobs
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.jobs = {}
+        self._jobs_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.workers = [
+            threading.Thread(target=self._worker, name=f"ingestion-worker-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+        logger.info(f"Ingestion manager started with {num_workers} workers, queue size {max_queue_size}")
+
+    def submit(self, pdf_path: str) -> IngestionJob:
+        """
+        Enqueue a PDF for ingestion without blocking.
+
+        :param pdf_path: Path to the PDF file.
+        :return: The queued IngestionJob.
+        :raises queue.Full: If the queue has no free slots.
+        """
+        job = IngestionJob(pdf_path)
+        self.queue.put_nowait(job)
+        with self._jobs_lock:
+            self.jobs[job.job_id] = job
+        logger.info(f"Ingestion job {job.job_id} queued for {pdf_path}")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Return the job with the given ID, or None if unknown."""
+        with self._jobs_lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[IngestionJob]:
+        """Return all known jobs, oldest first."""
+        with self._jobs_lock:
+            return sorted(self.jobs.values(), key=lambda job: job.created_at)
+
+    def restore_index(self):
+        """
+        Load the chunks already stored in MongoDB into the vector store, reusing their embeddings.
+
+        :return: Number of chunks loaded.
+        """
+        loaded = 0
+        batch = []
+        for document in self.pdf_processor.load_stored_chunks():
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                loaded += self._restore_batch(batch)
+                batch = []
+        if batch:
+            loaded += self._restore_batch(batch)
+        logger.info(f"Restored {loaded} stored chunks into the vector store")
+        return loaded
+
+    def _restore_batch(self, documents: List[Dict]) -> int:
+        self.vector_store_manager.add_embeddings(
+            [document["raw_text"] for document in documents],
+            [document["embedding"] for document in documents],
+            metadatas=[{"source": document.get("source")} for document in documents]
+        )
+        return len(documents)
+
+    def shutdown(self, timeout=5):
+        """Stop the workers after their current job; jobs still queued are left as they are."""
+        self._stop_event.set()
+        for worker in self.workers:
+            worker.join(timeout)
+        logger.info("Ingestion manager stopped")
+
+    def _worker(self):
+        while not self._stop_event.is_set():
+            try:
+                job = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._run(job)
+            finally:
+                self.queue.task_done()
+
+    def _run(self, job: IngestionJob):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.total_pages = self.pdf_processor.count_pages(job.pdf_path)
+            batch = []
+            for page_text in self.pdf_processor.load_pages(job.pdf_path):
+                # (raw, normalized) pairs: raw text is indexed and shown to the LLM
+                batch.extend(self.pdf_processor.chunk_text(page_text))
+                job.pages_parsed += 1
+                while len(batch) >= self.batch_size:
+                    self._index_batch(job, batch[:self.batch_size])
+                    batch = batch[self.batch_size:]
+            if batch:
+                self._index_batch(job, batch)
+            job.status = "completed"
+            logger.info(f"Ingestion job {job.job_id} completed: {job.vectors_indexed} chunks indexed")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Ingestion job {job.job_id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            self._prune_finished_jobs()
+
+    def _prune_finished_jobs(self):
+        # Jobs are stored in submission order, so the first finished ones are the oldest
+        with self._jobs_lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.status in ("completed", "failed")]
+            for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+                del self.jobs[job_id]
+
+    def _index_batch(self, job: IngestionJob, chunks: List[Tuple[str, str]]):
+        raw_chunks = [raw for raw, _ in chunks]
+        normalized_chunks = [normalized for _, normalized in chunks]
+
+        # Embedding happens outside the index lock, so queries keep being served meanwhile
+        embeddings = self.vector_store_manager.embed_documents(raw_chunks)
+        job.chunks_embedded += len(chunks)
+
+        # Index first: a MongoDB failure must not keep the chunks from becoming searchable
+        metadatas = [{"source": job.pdf_path} for _ in chunks]
+        self.vector_store_manager.add_embeddings(raw_chunks, embeddings, metadatas=metadatas)
+        job.vectors_indexed += len(chunks)
+
+        try:
+            self.pdf_processor.save_to_mongo(normalized_chunks, embeddings, raw_chunks=raw_chunks, source=job.pdf_path)
+        except PyMongoError as e:
+            logger.error(f"Ingestion job {job.job_id}: error saving chunks to MongoDB: {e}")
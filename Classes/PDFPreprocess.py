@@ -1,7 +1,7 @@
 from sentence_transformers import SentenceTransformer
 from pymongo import MongoClient
 import re
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
 import fitz  # PyMuPDF for PDF parsing
 
 
@@ -16,15 +16,27 @@ class PDFProcessor:
         db_name (str): MongoDB database name.
         collection_name (str): MongoDB collection name for storing chunks.
         embedding_model_name (str): The name of the SentenceTransformer model to use for embeddings.
+            It is stored alongside every embedding saved to MongoDB.
         """
         self.pdf_path = pdf_path
         self.mongo_uri = mongo_uri
         self.db_name = db_name
         self.collection_name = collection_name
-        self.client = MongoClient(mongo_uri)
+        self.client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
         self.db = self.client[db_name]
         self.collection = self.db[collection_name]
-        self.embedding_model = SentenceTransformer(embedding_model_name)  # Load the embedding model
+        self.embedding_model_name = embedding_model_name
+        self._embedding_model = None  # Loaded on first use by generate_embeddings
+
+    @property
+    def embedding_model(self) -> SentenceTransformer:
+        """
+        The SentenceTransformer model, loaded lazily so that callers which embed
+        chunks elsewhere (e.g. background ingestion) never load it.
+        """
+        if self._embedding_model is None:
+            self._embedding_model = SentenceTransformer(self.embedding_model_name)
+        return self._embedding_model
 
     def load_pdf(self) -> str:
         """
@@ -33,11 +45,34 @@ class PDFProcessor:
         Returns:
         str: Extracted text from the PDF.
         """
-        text = ""
-        with fitz.open(self.pdf_path) as pdf:
+        return "".join(self.load_pages())
+
+    def load_pages(self, pdf_path: Optional[str] = None) -> Iterator[str]:
+        """
+        Lazily extracts the text of a PDF file one page at a time.
+        
+        Parameters:
+        pdf_path (str): Path to the PDF file (defaults to the processor's own path).
+        
+        Returns:
+        Iterator[str]: Text of each page, in order.
+        """
+        with fitz.open(pdf_path or self.pdf_path) as pdf:
             for page in pdf:
-                text += page.get_text()
-        return text
+                yield page.get_text()
+
+    def count_pages(self, pdf_path: Optional[str] = None) -> int:
+        """
+        Returns the number of pages in a PDF file.
+        
+        Parameters:
+        pdf_path (str): Path to the PDF file (defaults to the processor's own path).
+        
+        Returns:
+        int: Number of pages.
+        """
+        with fitz.open(pdf_path or self.pdf_path) as pdf:
+            return pdf.page_count
 
     def normalize_text(self, text: str) -> str:
         """
@@ -79,10 +114,10 @@ class PDFProcessor:
         
         Parameters:
         text (str): Text to be split into chunks.
-        max_length (int): Maximum token count for each chunk.
+        max_length (int): Maximum word count for each chunk.
         
         Returns:
-        List[str]: List of text chunks.
+        List[str]: List of non-empty text chunks.
         """
         # Use regex to split the text into sentences
         sentences = re.split(r'(?<=[.!?]) +', text)
@@ -91,19 +126,40 @@ class PDFProcessor:
         current_chunk = ""
         
         for sentence in sentences:
-            # Split sentences to ensure the chunk size doesn't exceed `max_length`
-            if len(current_chunk.split()) + len(sentence.split()) <= max_length:
-                current_chunk += " " + sentence
-            else:
-                # Add the current chunk to chunks and start a new chunk
-                chunks.append(current_chunk.strip())
-                current_chunk = sentence
-
-        if current_chunk:
+            # Sentences longer than `max_length` (e.g. text without punctuation) are split by word count
+            words = sentence.split()
+            pieces = [" ".join(words[i:i + max_length]) for i in range(0, len(words), max_length)]
+            for piece in pieces:
+                # Split sentences to ensure the chunk size doesn't exceed `max_length`
+                if len(current_chunk.split()) + len(piece.split()) <= max_length:
+                    current_chunk += " " + piece
+                else:
+                    # Add the current chunk to chunks and start a new chunk
+                    if current_chunk.strip():
+                        chunks.append(current_chunk.strip())
+                    current_chunk = piece
+
+        if current_chunk.strip():
             chunks.append(current_chunk.strip())
         
         return chunks
 
+    def chunk_text(self, text: str, max_length: int = 200) -> List[Tuple[str, str]]:
+        """
+        Splits raw text into sentence-based chunks and normalizes each of them.
+        Splitting happens before normalization, which strips the punctuation
+        used to detect sentence boundaries.
+        
+        Parameters:
+        text (str): Raw text to be chunked.
+        max_length (int): Maximum word count for each chunk.
+        
+        Returns:
+        List[Tuple[str, str]]: (raw, normalized) pairs, skipping chunks that normalize to nothing.
+        """
+        pairs = ((chunk, self.normalize_text(chunk)) for chunk in self.split_text(text, max_length))
+        return [(raw, normalized) for raw, normalized in pairs if normalized]
+
     def generate_embeddings(self, chunks: List[str]) -> List[List[float]]:
         """
         Generates embeddings for each chunk using the SentenceTransformer model.
@@ -116,25 +172,59 @@ class PDFProcessor:
         """
         return self.embedding_model.encode(chunks).tolist()
 
-    def save_to_mongo(self, chunks: List[str], embeddings: List[List[float]]):
+    def save_to_mongo(self, chunks: List[str], embeddings: List[List[float]], raw_chunks: Optional[List[str]] = None, source: Optional[str] = None):
         """
         Saves chunks and their embeddings to MongoDB.
         
         Parameters:
         chunks (List[str]): List of text chunks to be stored.
         embeddings (List[List[float]]): Corresponding embeddings for the chunks.
+        raw_chunks (List[str]): Original (non-normalized) text of the chunks, stored as `raw_text`.
+        source (str): Path of the PDF the chunks come from.
+        
+        Each document is tagged with `embedding_model`, since embeddings from
+        different models are not comparable.
         """
-        documents = [{"chunk_text": chunk, "embedding": embedding} for chunk, embedding in zip(chunks, embeddings)]
+        documents = []
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            document = {"chunk_text": chunk, "embedding": embedding, "embedding_model": self.embedding_model_name}
+            if raw_chunks is not None:
+                document["raw_text"] = raw_chunks[i]
+            if source is not None:
+                document["source"] = source
+            documents.append(document)
         self.collection.insert_many(documents)
 
+    def has_chunks(self, source: str) -> bool:
+        """
+        Checks whether chunks of a PDF, embedded with this processor's model, are already stored.
+        
+        Parameters:
+        source (str): Path of the PDF, as passed to `save_to_mongo`.
+        
+        Returns:
+        bool: True if at least one chunk is stored.
+        """
+        return self.collection.count_documents({"source": source, "embedding_model": self.embedding_model_name}, limit=1) > 0
+
+    def load_stored_chunks(self) -> Iterator[Dict]:
+        """
+        Iterates over the stored chunks that have their raw text and were embedded with this processor's model.
+        
+        Returns:
+        Iterator[Dict]: Documents with `raw_text`, `embedding` and `source` fields.
+        """
+        query = {"embedding_model": self.embedding_model_name, "raw_text": {"$exists": True}}
+        projection = {"_id": False, "raw_text": True, "embedding": True, "source": True}
+        return self.collection.find(query, projection)
+
     def process_and_store(self):
         """
         Loads, processes, generates embeddings, and stores text chunks from PDF into MongoDB.
         """
         # Load and process text
         raw_text = self.load_pdf()
-        normalized_text = self.normalize_text(raw_text)  # Apply normalization
-        chunks = self.split_text(normalized_text)
+        chunks = [normalized for _, normalized in self.chunk_text(raw_text)]  # Split into chunks, then apply normalization
 
         # Generate embeddings
         embeddings = self.generate_embeddings(chunks)
@@ -143,13 +233,3 @@ class PDFProcessor:
         self.save_to_mongo(chunks, embeddings)
 
         print(f"Successfully saved {len(chunks)} chunks with embeddings to MongoDB.")
-
-# Example usage:
-pdf_processor = PDFProcessor(
-    pdf_path="./files_pdf/thinkpython2.pdf",
-    mongo_uri="mongodb://localhost:27017/",
-    db_name="pdf_database",
-    collection_name="text_chunks"
-)
-
-pdf_processor.process_and_store()
@@ -1,14 +1,35 @@
+import threading
+from typing import Any, List
+
 from langchain.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.docstore import InMemoryDocstore
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 import faiss
 import numpy as np
 
+from classes.QueryCache import LRUCache, normalize_query
+
+class LiveVectorStoreRetriever(BaseRetriever):
+    """Retriever che interroga il VectorStoreManager ad ogni richiesta, vedendo subito i nuovi chunk indicizzati."""
+    manager: Any
+    k: int = 5
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.manager.search(query, k=self.k)
+
+    def retrieve(self, query):
+        """Restituisce i documenti rilevanti per la query."""
+        return self.invoke(query)
+
 class VectorStoreManager:
-    def __init__(self, embedding_model_name="BAAI/bge-small-en-v1.5"):
+    def __init__(self, embedding_model_name="BAAI/bge-small-en-v1.5", cache_size=1024):
         # Crea embeddings usando HuggingFace
+        self.embedding_model_name = embedding_model_name
         self.embeddings = HuggingFaceEmbeddings(model_name=embedding_model_name)
-        
+
         # Prova a ottenere la dimensione dell'embedding
         sample_embedding = self.embeddings.embed_query("test")
         if isinstance(sample_embedding, list):
@@ -17,7 +38,7 @@ class VectorStoreManager:
             embedding_dimension = sample_embedding.shape[0]
         else:
             raise ValueError(f"Formato embedding non supportato: {type(sample_embedding)}")
-        
+
         # Inizializza l'indice FAISS con la dimensione calcolata
         faiss_index = faiss.IndexFlatL2(embedding_dimension)
         self.docstore = InMemoryDocstore({})
@@ -29,13 +50,67 @@ class VectorStoreManager:
             embedding_function=self.embeddings.embed_query
         )
 
+        # Protegge l'indice FAISS: gli embedding vengono calcolati fuori dal lock,
+        # così le scritture tengono il lock solo per il tempo dell'inserimento
+        self._lock = threading.Lock()
+
+        # Cache LRU condivise: query normalizzata -> embedding, (query normalizzata, k) -> risultati.
+        # I risultati sono legati alla versione dell'indice e scartati quando vengono aggiunti documenti
+        self.embedding_cache = LRUCache(max_size=cache_size)
+        self.results_cache = LRUCache(max_size=cache_size)
+        self._index_version = 0
+
     def add_document(self, document, document_id):
         """Aggiunge un documento all'indice FAISS."""
         embedding = self.embeddings.embed_query(document)
         if isinstance(embedding, list):
             embedding = embedding[0] if isinstance(embedding[0], list) else embedding
-        self.vector_store.add_texts([document], [document_id], embeddings=[embedding])
+        with self._lock:
+            self.vector_store.add_texts([document], [document_id], embeddings=[embedding])
+            self._index_version += 1
+
+    def embed_documents(self, texts):
+        """Calcola gli embedding di una lista di testi senza toccare l'indice."""
+        return self.embeddings.embed_documents(texts)
+
+    def add_embeddings(self, texts, embeddings, metadatas=None):
+        """Aggiunge all'indice FAISS testi con embedding già calcolati e restituisce gli id inseriti."""
+        with self._lock:
+            ids = self.vector_store.add_embeddings(
+                text_embeddings=list(zip(texts, embeddings)),
+                metadatas=metadatas
+            )
+            self._index_version += 1
+        return ids
+
+    def embed_query(self, query):
+        """Calcola l'embedding della query, riusando quello in cache se disponibile."""
+        key = normalize_query(query)
+        embedding = self.embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(key)
+            self.embedding_cache.put(key, embedding)
+        return embedding
 
     def search(self, query, k=5):
-        """Effettua una ricerca tra i documenti indicizzati."""
-        return self.vector_store.similarity_search(query, k=k)
\ No newline at end of file
+        """Effettua una ricerca tra i documenti indicizzati, restituendo copie dei documenti in cache."""
+        key = (normalize_query(query), k)
+        cached = self.results_cache.get(key)
+        if cached is not None and cached[0] == self._index_version:
+            return [document.copy(deep=True) for document in cached[1]]
+
+        embedding = self.embed_query(query)
+        with self._lock:
+            version = self._index_version
+            documents = self.vector_store.similarity_search_by_vector(embedding, k=k)
+        self.results_cache.put(key, (version, documents))
+        return [document.copy(deep=True) for document in documents]
+
+    def warm_up(self, queries):
+        """Pre-calcola gli embedding delle query fornite (es. le più frequenti nello storico)."""
+        for query in queries:
+            self.embed_query(query)
+
+    def retriever(self, k=5):
+        """Restituisce un retriever collegato all'indice live."""
+        return LiveVectorStoreRetriever(manager=self, k=k)
@@ -1,7 +1,6 @@
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.memory import ConversationBufferMemory
-from langchain_core.runnables import RunnablePassthrough
 from langchain.chains import ConversationalRetrievalChain
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.chat_history import BaseChatMessageHistory
@@ -59,23 +58,17 @@ class ChatBot():
         self.relevant_documents = []  # Reset for each new query
 
         if not self.memory:
-            # Non-memory case: Format the context and use the chatbot
-            chain = (
-                {"context": self.retriever | format_docs, "question": RunnablePassthrough()}
-                | self.prompt
-                | self.chatbot
-                | StrOutputParser()
-            )
+            # Non-memory case: retrieve once and reuse the documents for both the context and get_relevant_documents
+            self.relevant_documents = self.retriever.retrieve(query)
+            input_data = {"context": format_docs(self.relevant_documents), "question": query}
+            chain = self.prompt | self.chatbot | StrOutputParser()
             if not stream:
-                result = chain.invoke(query)
+                result = chain.invoke(input_data)
                 response = result
-                # Update relevant documents used in context
-                self.relevant_documents = self.retriever.retrieve(query)
             else:
-                for s in chain.stream(query):
+                for s in chain.stream(input_data):
                     print(s, end="", flush=True)
                     response += s
-                self.relevant_documents = self.retriever.retrieve(query)
         else:
             # Memory case: Use ConversationBufferMemory and conversational retrieval chain
             message_history = BaseChatMessageHistory()
@@ -103,7 +96,8 @@ class ChatBot():
                 for s in chain.stream(query):
                     print(s["answer"], end="", flush=True)
                     response += s["answer"]
-                self.relevant_documents = chain.retrieve(query)
+                    # Reuse the documents the chain already retrieved
+                    self.relevant_documents = s.get("source_documents", self.relevant_documents)
 
         return response
 
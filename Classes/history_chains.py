@@ -38,11 +38,15 @@ class MessageHistoryStore:
         return self.store[session_id]
 
 class ChainWithHistory:
-    def __init__(self, qa_chain, message_history_store: MessageHistoryStore, input_messages_key="question", history_messages_key="history"):
+    def __init__(self, qa_chain, message_history_store: MessageHistoryStore, input_messages_key="question", history_messages_key="history",
+                 chain_input_key="query", chain_output_key="result"):
+        """chain_input_key and chain_output_key default to the keys used by RetrievalQA"""
         self.qa_chain = qa_chain
         self.message_history_store = message_history_store
         self.input_messages_key = input_messages_key
         self.history_messages_key = history_messages_key
+        self.chain_input_key = chain_input_key
+        self.chain_output_key = chain_output_key
 
     def invoke(self, input_data: Dict, config: Dict = None):
         """Invoke the Q&A chain with the message history"""
@@ -53,14 +57,16 @@ class ChainWithHistory:
         # Fetch the history using the session_id
         history = self.message_history_store.get_by_session_id(session_id)
 
-        # Add the history messages to the input_data
-        input_data[self.input_messages_key] = history.messages
+        # Pass the question under the key the Q&A chain expects, together with the history messages
+        question = input_data[self.input_messages_key]
+        chain_input = {self.chain_input_key: question, self.history_messages_key: history.messages}
 
         # Process the input data through the Q&A chain
-        response = self.qa_chain.invoke(input_data)
+        output = self.qa_chain.invoke(chain_input)
+        response = output[self.chain_output_key] if isinstance(output, dict) else output
 
         # Add user and bot messages to history
-        user_message = BaseMessage(type="user", content=input_data[self.input_messages_key])
+        user_message = BaseMessage(type="user", content=question)
         history.add_messages([user_message])
 
         bot_message = BaseMessage(type="bot", content=response)
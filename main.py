@@ -1,13 +1,21 @@
 import logging
+import queue
+import shutil
+import threading
 import uuid
-from fastapi import FastAPI, HTTPException, Body
+from collections import Counter
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Body, File, Form, UploadFile
 from pydantic import BaseModel
 from classes.PDFPreprocess import PDFProcessor
 from classes.LangchainManager import LangchainManager
 from classes.history_chains import MessageHistoryStore, ChainWithHistory  # Ensure this import is correct
 from classes.DBManager import DBManager  # Importing the DBManager class
-from langchain.retrievers import ElasticSearchBM25Retriever
+from classes.VectorStoreManager import VectorStoreManager
+from classes.QueryCache import normalize_query
+from classes.IngestionManager import IngestionManager
 from dotenv import load_dotenv
+from pymongo.errors import PyMongoError
 import os
 
 # Initialize the logger
@@ -33,15 +41,29 @@ db_manager = DBManager(
     port=27017
 )
 
-# Initialize PDF Processor (this could be moved to a background task if needed)
+# Live vector store: chunks become searchable as soon as an ingestion batch is indexed
+vector_store_manager = VectorStoreManager(cache_size=int(os.getenv("QUERY_CACHE_SIZE", "1024")))
+warm_up_queries = int(os.getenv("WARM_UP_QUERIES", "100"))  # Number of frequent past queries embedded at startup
+
+# Initialize PDF Processor (the default PDF is ingested in the background at startup)
 pdf_path = "./files_pdf/thinkpython2.pdf"  # Modify this path as needed
+ingest_root = os.path.realpath(os.getenv("INGEST_ROOT", "./files_pdf"))  # /ingest only reads paths under this directory
+upload_dir = os.path.join(ingest_root, "uploads")  # Where PDFs uploaded through /ingest are saved
 pdf_processor = PDFProcessor(
     pdf_path=pdf_path,
-    mongo_uri="mongodb://localhost:27017/",
+    mongo_uri=os.getenv("MONGO_URI", "mongodb://localhost:27017/"),
     db_name="pdf_database",
-    collection_name="text_chunks"
+    collection_name="text_chunks",
+    embedding_model_name=vector_store_manager.embedding_model_name  # Same model for MongoDB and the vector store
+)
+
+# Bounded pool of background workers for PDF ingestion
+ingestion_manager = IngestionManager(
+    pdf_processor=pdf_processor,
+    vector_store_manager=vector_store_manager,
+    num_workers=int(os.getenv("INGESTION_WORKERS", "2")),
+    max_queue_size=int(os.getenv("INGESTION_QUEUE_SIZE", "16"))
 )
-pdf_processor.process_and_store()
 
 # Initialize LangchainManager for Q&A interaction
 openai_api_base = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
@@ -54,11 +76,8 @@ langchain_manager = LangchainManager(openai_api_base=openai_api_base, api_key=ap
 # Set up message history management
 message_history_store = MessageHistoryStore()
 
-# Example setup for ElasticSearchRetriever, replace it with your chosen method
-retriever = ElasticSearchBM25Retriever(
-    index_name="your_index_name", 
-    embedding_function=pdf_processor.embedding_model.encode  # This should match your embedding setup
-)
+# Retriever backed by the live vector store
+retriever = vector_store_manager.retriever(k=5)
 
 qa_chain = langchain_manager.create_chain(retriever=retriever)
 
@@ -68,6 +87,51 @@ chain_with_history = ChainWithHistory(
     message_history_store=message_history_store
 )
 
+def get_frequent_queries(limit):
+    """Return the most frequent user questions found in the stored conversation histories."""
+    # Same normalization as normalize_query: lowercase, words joined by a single space
+    words = {"$regexFindAll": {"input": {"$toLower": "$history.content"}, "regex": "\\S+"}}
+    normalized_content = {"$reduce": {
+        "input": {"$map": {"input": words, "as": "word", "in": "$$word.match"}},
+        "initialValue": "",
+        "in": {"$cond": [{"$eq": ["$$value", ""]}, "$$this", {"$concat": ["$$value", " ", "$$this"]}]}
+    }}
+    pipeline = [
+        # Conversations share the collection with the PDF chunks: only look at conversation documents
+        {"$match": {"conversation_id": {"$exists": True}, "conversation_history.type": "user"}},
+        # /chat stores a snapshot of the whole history at every turn: keep only the latest one per conversation
+        {"$sort": {"_id": -1}},
+        {"$group": {"_id": "$conversation_id", "history": {"$first": "$conversation_history"}}},
+        {"$unwind": "$history"},
+        {"$match": {"history.type": "user", "history.content": {"$type": "string"}}},
+        {"$group": {"_id": normalized_content, "count": {"$sum": 1}}},
+        {"$match": {"_id": {"$ne": ""}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit}
+    ]
+    # Merge any groups that Python's normalization still maps to the same query (e.g. non-ASCII case)
+    counts = Counter()
+    for result in db_manager.aggregate(pipeline):
+        counts[normalize_query(result["_id"])] += result["count"]
+    return [query for query, _ in counts.most_common(limit)]
+
+def restore_index():
+    """Load the chunks stored in MongoDB into the vector store, then ingest the default PDF if it was never stored."""
+    default_pdf = os.path.realpath(pdf_path)
+    try:
+        ingestion_manager.restore_index()
+        if pdf_processor.has_chunks(default_pdf):
+            return
+    except PyMongoError as e:
+        logger.error(f"Error restoring the vector store from MongoDB: {e}")
+    ingestion_manager.submit(default_pdf)
+
+def warm_up_query_cache():
+    """Pre-compute the embeddings of the most frequent historical queries."""
+    queries = get_frequent_queries(warm_up_queries)
+    vector_store_manager.warm_up(queries)
+    logger.info(f"Query cache warmed up with {len(queries)} queries")
+
 @app.get("/")
 def read_root():
     logger.info("Root endpoint accessed")
@@ -146,7 +210,88 @@ def insert_document(document: dict):
     else:
         raise HTTPException(status_code=400, detail="Error inserting document.")
 
+def remove_files(file_paths):
+    """Delete the given files, ignoring the ones already gone."""
+    for file_path in file_paths:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+@app.post("/ingest", status_code=202)
+def ingest(files: Optional[List[UploadFile]] = File(None), paths: Optional[List[str]] = Form(None)):
+    """Enqueue uploaded PDFs and/or PDF paths for background ingestion."""
+    if not files and not paths:
+        raise HTTPException(status_code=400, detail="Provide at least one PDF file or path.")
+
+    # Validate everything before writing anything to disk
+    pdf_paths = []
+    for path in paths or []:
+        real_path = os.path.realpath(os.path.join(ingest_root, path))
+        if os.path.commonpath([real_path, ingest_root]) != ingest_root:
+            raise HTTPException(status_code=400, detail=f"Path outside the ingest directory: {path}")
+        if not real_path.lower().endswith(".pdf") or not os.path.isfile(real_path):
+            raise HTTPException(status_code=400, detail=f"Not a PDF file: {path}")
+        pdf_paths.append(real_path)
+
+    for file in files or []:
+        if not file.filename or not file.filename.lower().endswith(".pdf"):
+            raise HTTPException(status_code=400, detail=f"Not a PDF file: {file.filename}")
+
+    uploaded_names = {}  # Saved path -> original filename
+    try:
+        os.makedirs(upload_dir, exist_ok=True)
+        for file in files or []:
+            saved_path = os.path.join(upload_dir, f"{uuid.uuid4()}_{os.path.basename(file.filename)}")
+            uploaded_names[saved_path] = file.filename
+            with open(saved_path, "wb") as out:
+                shutil.copyfileobj(file.file, out)
+    except Exception as e:
+        logger.error(f"Error saving uploaded PDF: {e}")
+        remove_files(uploaded_names)
+        raise HTTPException(status_code=500, detail="Error saving uploaded PDF.")
+    pdf_paths.extend(uploaded_names)
+
+    jobs = []
+    rejected = []
+    for path in pdf_paths:
+        try:
+            jobs.append(ingestion_manager.submit(path).to_dict())
+        except queue.Full:
+            rejected.append(path)
+
+    # Uploads that were not queued are not referenced by any job
+    remove_files([path for path in rejected if path in uploaded_names])
+    rejected = [uploaded_names.get(path, path) for path in rejected]
+
+    if not jobs:
+        logger.warning("Ingestion queue is full, rejecting request")
+        raise HTTPException(status_code=429, detail="Ingestion queue is full, retry later.")
+    return {"jobs": jobs, "rejected": rejected}
+
+@app.get("/ingest")
+def list_ingestion_jobs():
+    """List all ingestion jobs with their progress."""
+    return {"jobs": [job.to_dict() for job in ingestion_manager.list_jobs()]}
+
+@app.get("/ingest/{job_id}")
+def get_ingestion_job(job_id: str):
+    """Retrieve status and progress of an ingestion job."""
+    job = ingestion_manager.get_job(job_id)
+    if job:
+        return job.to_dict()
+    else:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+
+@app.on_event("startup")
+def startup():
+    """Restore the index, ingest the default PDF and warm up the query cache in the background so the API is available immediately."""
+    threading.Thread(target=restore_index, name="index-restore", daemon=True).start()
+    if warm_up_queries > 0:
+        threading.Thread(target=warm_up_query_cache, name="query-cache-warm-up", daemon=True).start()
+
 @app.on_event("shutdown")
 def shutdown():
-    """Close the MongoDB connection when the server shuts down."""
+    """Stop the ingestion workers and close the MongoDB connection when the server shuts down."""
+    ingestion_manager.shutdown()
     db_manager.close_connection()